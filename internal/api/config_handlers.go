@@ -180,7 +180,7 @@ func (s *Server) updateConfig(w http.ResponseWriter, r *http.Request) {
 	if req.Embedding != nil {
 		if req.Embedding.Provider != "" {
 			// Validate embedding provider
-			validProviders := []string{"ollama", "openai", "fallback"}
+			validProviders := []string{"ollama", "openai", "fallback", "local"}
 			valid := false
 			for _, provider := range validProviders {
 				if req.Embedding.Provider == provider {
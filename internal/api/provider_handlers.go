@@ -352,7 +352,7 @@ func (s *Server) setEmbeddingProvider(w http.ResponseWriter, r *http.Request) {
 	}
 
 	// Validate provider
-	validProviders := []string{"ollama", "openai", "fallback"}
+	validProviders := []string{"ollama", "openai", "fallback", "local"}
 	valid := false
 	for _, provider := range validProviders {
 		if config.Provider == provider {
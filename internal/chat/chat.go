@@ -7,6 +7,7 @@ import (
 	"fmt"
 	"net/http"
 	"os"
+	"os/exec"
 	"path/filepath"
 	"strings"
 	"time"
@@ -641,6 +642,7 @@ func (cs *ChatSession) selectEmbedding() {
 	// Check available providers
 	ollamaAvailable := isOllamaAvailable()
 	openaiAvailable := isOpenAIAvailable()
+	localAvailable := isLocalEmbeddingAvailable()
 
 	fmt.Println("Available providers:")
 	fmt.Println("  1. Fallback (current) - Simple hash-based, always works")
@@ -657,7 +659,13 @@ func (cs *ChatSession) selectEmbedding() {
 		fmt.Println("  3. OpenAI - Not available (set OPENAI_API_KEY)")
 	}
 
-	fmt.Print("\nSelect provider (1-3): ")
+	if localAvailable {
+		fmt.Println("  4. Local - Fast static embeddings (bundled embed worker)")
+	} else {
+		fmt.Println("  4. Local - Not available (run scripts/extract_embeddings.py)")
+	}
+
+	fmt.Print("\nSelect provider (1-4): ")
 
 	scanner := bufio.NewScanner(os.Stdin)
 	if scanner.Scan() {
@@ -680,6 +688,13 @@ func (cs *ChatSession) selectEmbedding() {
 			} else {
 				fmt.Println("OpenAI not available. Set OPENAI_API_KEY environment variable.")
 			}
+		case "4":
+			if localAvailable {
+				cs.setEmbeddingProvider("local")
+			} else {
+				fmt.Println("Local embed worker not available. Generate its data with:")
+				fmt.Println("   python3 scripts/extract_embeddings.py")
+			}
 		default:
 			fmt.Println("Invalid choice")
 		}
@@ -763,6 +778,25 @@ func isOpenAIAvailable() bool {
 	return os.Getenv("OPENAI_API_KEY") != ""
 }
 
+func isLocalEmbeddingAvailable() bool {
+	if _, err := exec.LookPath("python3"); err != nil {
+		return false
+	}
+	script := os.Getenv("CODEFORGE_EMBED_WORKER")
+	if script == "" {
+		script = filepath.Join("scripts", "embed.py")
+	}
+	if _, err := os.Stat(script); err != nil {
+		return false
+	}
+	dataDir := os.Getenv("CODEFORGE_EMBED_DATA")
+	if dataDir == "" {
+		dataDir = filepath.Join(filepath.Dir(script), "embedding_data")
+	}
+	_, err := os.Stat(filepath.Join(dataDir, "embeddings_metadata.json"))
+	return err == nil
+}
+
 // setProviderSpecificOptions sets provider-specific fields in ApiHandlerOptions
 func setProviderSpecificOptions(options *llm.ApiHandlerOptions, provider, apiKey string) {
 	switch strings.ToLower(provider) {
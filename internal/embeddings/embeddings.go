@@ -23,6 +23,7 @@ const (
 	ProviderOllama EmbeddingProvider = iota
 	ProviderOpenAI
 	ProviderFallback
+	ProviderLocal
 )
 
 // EmbeddingService handles text embedding generation with multiple providers
@@ -89,6 +90,17 @@ func Initialize(cfg *config.Config) error {
 				return nil
 			}
 			log.Printf("OpenAI configured but not available, falling back...")
+		case "local":
+			if isLocalWorkerAvailable() {
+				if err := checkProviderChange(ProviderLocal); err != nil {
+					log.Printf("Provider change validation failed: %v", err)
+				}
+				embeddingService.provider = ProviderLocal
+				log.Printf("Using local embedding worker (configured)")
+				embeddingService.initialized = true
+				return nil
+			}
+			log.Printf("Local embed worker configured but not available, falling back...")
 		}
 	}
 
@@ -106,6 +118,8 @@ func Initialize(cfg *config.Config) error {
 		log.Printf("Ollama detected - use '/embedding ollama' for better quality")
 	} else if isOpenAIAvailable() {
 		log.Printf("OpenAI API detected - use '/embedding openai' for better quality")
+	} else if isLocalWorkerAvailable() {
+		log.Printf("Local embed worker detected - use '/embedding local' for better quality")
 	}
 
 	embeddingService.initialized = true
@@ -128,6 +142,8 @@ func GetEmbedding(ctx context.Context, text string) ([]float32, error) {
 		return getOllamaEmbedding(ctx, text)
 	case ProviderOpenAI:
 		return getOpenAIEmbedding(ctx, text)
+	case ProviderLocal:
+		return getLocalEmbedding(ctx, text)
 	default:
 		return getFallbackEmbedding(text), nil
 	}
@@ -310,6 +326,8 @@ func getProviderName(provider EmbeddingProvider) string {
 		return "OpenAI"
 	case ProviderFallback:
 		return "Fallback"
+	case ProviderLocal:
+		return "Local"
 	default:
 		return "Unknown"
 	}
@@ -324,6 +342,11 @@ func getProviderDimensions(provider EmbeddingProvider) int {
 		return 1536 // text-embedding-3-small
 	case ProviderFallback:
 		return 384 // Hash-based fallback
+	case ProviderLocal:
+		if dim := getLocalWorkerDimensions(); dim > 0 {
+			return dim
+		}
+		return 256 // potion-base-8M static embeddings
 	default:
 		return 384
 	}
@@ -391,6 +414,11 @@ func ValidateProviderChange(newProviderName string) error {
 		newProvider = ProviderOpenAI
 	case "fallback":
 		newProvider = ProviderFallback
+	case "local":
+		if !isLocalWorkerAvailable() {
+			return fmt.Errorf("local embed worker not available")
+		}
+		newProvider = ProviderLocal
 	default:
 		return fmt.Errorf("unknown provider: %s", newProviderName)
 	}
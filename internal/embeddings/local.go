@@ -0,0 +1,248 @@
+package embeddings
+
+import (
+	"bufio"
+	"context"
+	"encoding/binary"
+	"encoding/json"
+	"fmt"
+	"io"
+	"log"
+	"math"
+	"os"
+	"os/exec"
+	"path/filepath"
+	"sync"
+	"sync/atomic"
+)
+
+// localEmbedRequest is one line of the worker's stdin protocol
+type localEmbedRequest struct {
+	ID   int    `json:"id"`
+	Text string `json:"text"`
+}
+
+// localWorker wraps the persistent scripts/embed.py subprocess.
+// Requests go in as newline-delimited JSON; responses come back as
+// binary frames: a 4-byte count and 4-byte dim (little-endian) followed
+// by count*dim float32 values. dim=0 marks an error frame (detail on the
+// worker's stderr); count=0 with a real dim is a successful empty result.
+type localWorker struct {
+	mu     sync.Mutex
+	cmd    *exec.Cmd
+	stdin  io.WriteCloser
+	stdout *bufio.Reader
+	dim    int
+	nextID int
+	closed atomic.Bool
+}
+
+var (
+	localWorkerMu       sync.Mutex
+	localWorkerInstance *localWorker
+)
+
+// localWorkerScript returns the worker script path (overridable for deployments)
+func localWorkerScript() string {
+	if script := os.Getenv("CODEFORGE_EMBED_WORKER"); script != "" {
+		return script
+	}
+	return filepath.Join("scripts", "embed.py")
+}
+
+// localWorkerDataDir returns the extracted-artifact directory embed.py will use
+func localWorkerDataDir() string {
+	if dir := os.Getenv("CODEFORGE_EMBED_DATA"); dir != "" {
+		return dir
+	}
+	return filepath.Join(filepath.Dir(localWorkerScript()), "embedding_data")
+}
+
+// isLocalWorkerAvailable checks if the embed worker can be spawned and serve
+func isLocalWorkerAvailable() bool {
+	if _, err := exec.LookPath("python3"); err != nil {
+		return false
+	}
+	if _, err := os.Stat(localWorkerScript()); err != nil {
+		return false
+	}
+
+	// The script is in every checkout; the worker only starts once
+	// extract_embeddings.py has produced the artifacts it serves from
+	dataDir := localWorkerDataDir()
+	for _, name := range []string{"embeddings_metadata.json", "embeddings.bin", "tokenizer.json"} {
+		if _, err := os.Stat(filepath.Join(dataDir, name)); err != nil {
+			return false
+		}
+	}
+	return true
+}
+
+// startLocalWorker spawns embed.py and waits for its ready frame
+func startLocalWorker() (*localWorker, error) {
+	cmd := exec.Command("python3", localWorkerScript(), "--binary")
+	cmd.Stderr = os.Stderr
+
+	stdin, err := cmd.StdinPipe()
+	if err != nil {
+		return nil, fmt.Errorf("failed to open worker stdin: %w", err)
+	}
+	stdoutPipe, err := cmd.StdoutPipe()
+	if err != nil {
+		return nil, fmt.Errorf("failed to open worker stdout: %w", err)
+	}
+	if err := cmd.Start(); err != nil {
+		return nil, fmt.Errorf("failed to start embed worker: %w", err)
+	}
+
+	stdout := bufio.NewReader(stdoutPipe)
+	count, dim, err := readFrameHeader(stdout)
+	if err != nil {
+		cmd.Process.Kill()
+		cmd.Wait()
+		return nil, fmt.Errorf("embed worker exited before ready: %w", err)
+	}
+	if count != 0 || dim == 0 {
+		cmd.Process.Kill()
+		cmd.Wait()
+		return nil, fmt.Errorf("unexpected embed worker greeting (count=%d, dim=%d)", count, dim)
+	}
+
+	log.Printf("Local embedding worker ready (%d dimensions)", dim)
+	return &localWorker{cmd: cmd, stdin: stdin, stdout: stdout, dim: int(dim)}, nil
+}
+
+// readFrameHeader reads one <count, dim> response frame header
+func readFrameHeader(r io.Reader) (uint32, uint32, error) {
+	var header [8]byte
+	if _, err := io.ReadFull(r, header[:]); err != nil {
+		return 0, 0, err
+	}
+	return binary.LittleEndian.Uint32(header[0:4]), binary.LittleEndian.Uint32(header[4:8]), nil
+}
+
+// embed sends one text to the worker and reads back its embedding frame
+func (w *localWorker) embed(ctx context.Context, text string) ([]float32, error) {
+	if err := ctx.Err(); err != nil {
+		return nil, err
+	}
+
+	w.mu.Lock()
+	defer w.mu.Unlock()
+
+	if w.closed.Load() {
+		return nil, fmt.Errorf("embed worker is not running")
+	}
+
+	w.nextID++
+	data, err := json.Marshal(localEmbedRequest{ID: w.nextID, Text: text})
+	if err != nil {
+		return nil, fmt.Errorf("failed to marshal request: %w", err)
+	}
+
+	// Pipe I/O has no deadline support, so the roundtrip runs in a
+	// goroutine and cancellation kills the worker to unwind the blocked
+	// read; the next call respawns a fresh one.
+	type result struct {
+		embedding []float32
+		err       error
+	}
+	done := make(chan result, 1)
+	go func() {
+		embedding, err := w.roundtrip(data)
+		done <- result{embedding, err}
+	}()
+
+	select {
+	case res := <-done:
+		return res.embedding, res.err
+	case <-ctx.Done():
+		w.close()
+		return nil, ctx.Err()
+	}
+}
+
+// roundtrip performs one request write + framed response read; calls are
+// serialized by embed via w.mu
+func (w *localWorker) roundtrip(request []byte) ([]float32, error) {
+	if _, err := w.stdin.Write(append(request, '\n')); err != nil {
+		w.close()
+		return nil, fmt.Errorf("failed to write to embed worker: %w", err)
+	}
+
+	count, dim, err := readFrameHeader(w.stdout)
+	if err != nil {
+		w.close()
+		return nil, fmt.Errorf("failed to read embed worker response: %w", err)
+	}
+	if dim == 0 {
+		// Error frame; the worker stays alive and logged detail to stderr
+		return nil, fmt.Errorf("embed worker rejected the request (see worker stderr)")
+	}
+	if count == 0 {
+		// Successful empty result (e.g. an empty batch)
+		return []float32{}, nil
+	}
+
+	payload := make([]byte, int(count)*int(dim)*4)
+	if _, err := io.ReadFull(w.stdout, payload); err != nil {
+		w.close()
+		return nil, fmt.Errorf("failed to read embedding payload: %w", err)
+	}
+
+	// Single-text requests always come back as one row
+	embedding := make([]float32, dim)
+	for i := range embedding {
+		embedding[i] = math.Float32frombits(binary.LittleEndian.Uint32(payload[i*4:]))
+	}
+	return embedding, nil
+}
+
+// close tears down a dead worker; safe to call from any goroutine
+func (w *localWorker) close() {
+	if !w.closed.CompareAndSwap(false, true) {
+		return
+	}
+	w.stdin.Close()
+	if w.cmd.Process != nil {
+		w.cmd.Process.Kill()
+	}
+	w.cmd.Wait()
+}
+
+// getLocalWorker returns the shared worker, (re)spawning it when needed
+func getLocalWorker() (*localWorker, error) {
+	localWorkerMu.Lock()
+	defer localWorkerMu.Unlock()
+
+	if localWorkerInstance != nil && !localWorkerInstance.closed.Load() {
+		return localWorkerInstance, nil
+	}
+
+	worker, err := startLocalWorker()
+	if err != nil {
+		return nil, err
+	}
+	localWorkerInstance = worker
+	return worker, nil
+}
+
+// getLocalEmbedding gets an embedding from the persistent local worker
+func getLocalEmbedding(ctx context.Context, text string) ([]float32, error) {
+	worker, err := getLocalWorker()
+	if err != nil {
+		return nil, err
+	}
+	return worker.embed(ctx, text)
+}
+
+// getLocalWorkerDimensions reports the live worker's dimensions, if running
+func getLocalWorkerDimensions() int {
+	localWorkerMu.Lock()
+	defer localWorkerMu.Unlock()
+
+	if localWorkerInstance != nil && !localWorkerInstance.closed.Load() {
+		return localWorkerInstance.dim
+	}
+	return 0
+}
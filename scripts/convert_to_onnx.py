@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Convert the CodeForge embedding model to ONNX for the Go (Hugot) runtime.
+
+The model2vec pipeline is StaticEmbedding -> mean pool -> L2 normalize,
+so the graph is built by hand as three nodes (Gather, ReduceMean,
+LpNormalization) — no tracing noise, nothing for the runtime to fuse
+away. Tracing through torch.onnx.export remains as a fallback for
+modules that are not a plain embedding table.
+
+Outputs model.onnx next to the extracted embedding data
+(see extract_embeddings.py).
+"""
+
+import os
+import sys
+
+import numpy as np
+import torch
+
+# Pin intra-op parallelism before any kernels run: CPU-only defaults can
+# be a single thread or oversubscribed, either of which makes model load
+# and tracing crawl. One interop thread avoids pool thrashing.
+torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))
+torch.set_num_interop_threads(1)
+
+MODEL_PATH = os.environ.get("CODEFORGE_EMBED_MODEL", "minishlab/potion-base-8M")
+ONNX_PATH = os.environ.get(
+    "CODEFORGE_ONNX_PATH",
+    os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "embedding_data", "model.onnx"
+    ),
+)
+
+# opset >= 13 unlocks folding rules (Gather/Squeeze/Softmax) that 11
+# lacks; 17 is the newest opset ONNX Runtime has supported for a while.
+OPSET_VERSION = 17
+
+
+class Model2VecWrapper(torch.nn.Module):
+    """Traceable StaticEmbedding + mean pool + L2 normalize pipeline."""
+
+    def __init__(self, embedding):
+        super().__init__()
+        self.embedding = embedding
+
+    def forward(self, input_ids):
+        token_embeddings = self.embedding(input_ids)  # (batch, seq, dim)
+        pooled = token_embeddings.mean(dim=1)
+        return torch.nn.functional.normalize(pooled, p=2, dim=1)
+
+
+def build_static_onnx_graph(weights, onnx_path):
+    """Hand-build the 3-node graph for a static embedding matrix.
+
+    Gather(weights, input_ids) -> ReduceMean(axis=1) -> LpNormalization is
+    the entire model2vec forward; building it directly avoids the dozens
+    of Shape/Slice/Unsqueeze nodes the tracer emits for dynamic shapes.
+    """
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    dim = int(weights.shape[1])
+    graph = helper.make_graph(
+        [
+            helper.make_node("Gather", ["weights", "input_ids"], ["gathered"], axis=0),
+            helper.make_node(
+                "ReduceMean", ["gathered"], ["pooled"], axes=[1], keepdims=0
+            ),
+            helper.make_node(
+                "LpNormalization", ["pooled"], ["embeddings"], axis=1, p=2
+            ),
+        ],
+        "model2vec",
+        inputs=[
+            helper.make_tensor_value_info(
+                "input_ids", TensorProto.INT64, ["batch", "seq"]
+            )
+        ],
+        outputs=[
+            helper.make_tensor_value_info(
+                "embeddings", TensorProto.FLOAT, ["batch", dim]
+            )
+        ],
+        initializer=[
+            numpy_helper.from_array(
+                weights.astype(np.float32, copy=False), "weights"
+            )
+        ],
+    )
+    model_onnx = helper.make_model(
+        graph, opset_imports=[helper.make_opsetid("", OPSET_VERSION)]
+    )
+    onnx.checker.check_model(model_onnx)
+    onnx.save(model_onnx, onnx_path)
+
+
+def convert_model_to_onnx(model_path=MODEL_PATH, onnx_path=ONNX_PATH):
+    """Export the embedding pipeline to ONNX."""
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(os.path.dirname(onnx_path), exist_ok=True)
+
+    print(f"Loading model: {model_path}")
+    model = SentenceTransformer(model_path)
+    embedding = getattr(model[0], "embedding", None)
+    if embedding is None:
+        raise TypeError(
+            f"{type(model[0]).__name__} has no .embedding module — "
+            "only static-embedding pipelines can be exported"
+        )
+
+    # sentence-transformers' StaticEmbedding keeps the table in an
+    # EmbeddingBag (the potion models land here), plain nn.Embedding
+    # covers the rest; both expose the matrix as .weight, which is all
+    # the hand-built graph needs.
+    if isinstance(embedding, (torch.nn.Embedding, torch.nn.EmbeddingBag)):
+        build_static_onnx_graph(embedding.weight.detach().cpu().numpy(), onnx_path)
+        print(f"✅ Exported hand-built 3-node graph to {onnx_path}")
+    else:
+        # Not a plain embedding table — trace the pipeline instead.
+        wrapper = Model2VecWrapper(embedding)
+        wrapper.eval()
+        export_traced(wrapper, onnx_path)
+        optimize_onnx_graph(onnx_path)
+
+    export_fp16(onnx_path)
+    return onnx_path
+
+
+def export_fp16(onnx_path):
+    """Write an FP16 sibling (model.fp16.onnx) next to the FP32 export.
+
+    The Gather is memory-bound, so halving bytes-per-row halves the
+    dominant cost; keep_io_types leaves the input/output tensors FP32 so
+    callers need no changes. Both models are emitted and the Hugot side
+    picks based on hardware — acceptance is cosine similarity > 0.999
+    against FP32 on a sample corpus. Skipped with a notice when
+    onnxconverter-common is not installed.
+    """
+    import onnx
+
+    try:
+        from onnxconverter_common import float16
+    except ImportError:
+        print("onnxconverter-common not installed, skipping FP16 export")
+        return
+
+    model_fp16 = float16.convert_float_to_float16(
+        onnx.load(onnx_path), keep_io_types=True
+    )
+    fp16_path = onnx_path.replace(".onnx", ".fp16.onnx")
+    onnx.save(model_fp16, fp16_path)
+    print(f"✅ Exported FP16 ONNX model to {fp16_path}")
+
+
+def _torch_supports_dynamo_export():
+    version = torch.__version__.split("+")[0].split(".")
+    try:
+        return (int(version[0]), int(version[1])) >= (2, 5)
+    except (ValueError, IndexError):
+        return False
+
+
+def export_traced(wrapper, onnx_path):
+    """Fallback: export the wrapper through torch.onnx.
+
+    Prefers the dynamo exporter (torch >= 2.5): it avoids the
+    Shape/Slice/Unsqueeze/Concat cluster the legacy tracer emits for
+    size-dependent ops and folds constants by default. Older torch falls
+    back to the legacy tracer.
+    """
+    vocab_size = wrapper.embedding.num_embeddings
+    dummy_input = torch.randint(0, vocab_size, (1, 16), dtype=torch.int64)
+
+    # The wrapper mean-pools over dim 1 itself, so the module must return
+    # per-token embeddings; anything that pools internally (EmbeddingBag
+    # calling conventions) belongs in the hand-built graph path.
+    with torch.no_grad():
+        probe = wrapper.embedding(dummy_input)
+    if probe.dim() != 3:
+        raise TypeError(
+            f"cannot trace {type(wrapper.embedding).__name__}: expected "
+            f"(batch, seq, dim) token embeddings, got shape {tuple(probe.shape)}"
+        )
+
+    # Fused oneDNN ops land in the traced graph instead of their
+    # unfused equivalents.
+    torch.jit.enable_onednn_fusion(True)
+
+    if _torch_supports_dynamo_export():
+        torch.onnx.export(
+            wrapper,
+            (dummy_input,),
+            onnx_path,
+            dynamo=True,
+            input_names=["input_ids"],
+            output_names=["embeddings"],
+            dynamic_shapes={
+                "input_ids": {
+                    0: torch.export.Dim("batch"),
+                    1: torch.export.Dim("seq"),
+                }
+            },
+        )
+        print(f"✅ Exported ONNX model (dynamo) to {onnx_path}")
+        return
+
+    torch.onnx.export(
+        wrapper,
+        (dummy_input,),
+        onnx_path,
+        input_names=["input_ids"],
+        output_names=["embeddings"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "seq"},
+            "embeddings": {0: "batch"},
+        },
+        opset_version=OPSET_VERSION,
+        do_constant_folding=True,
+    )
+    print(f"✅ Exported traced ONNX model to {onnx_path}")
+
+
+def optimize_onnx_graph(onnx_path):
+    """Post-export cleanup: optimizer passes plus shape inference."""
+    import onnx
+
+    try:
+        import onnxoptimizer
+    except ImportError:
+        onnxoptimizer = None
+        print("onnxoptimizer not installed, skipping graph passes")
+
+    if onnxoptimizer is not None:
+        model_onnx = onnx.load(onnx_path)
+        passes = [
+            "eliminate_identity",
+            "eliminate_nop_transpose",
+            "eliminate_deadend",
+            "fuse_consecutive_transposes",
+            "fuse_matmul_add_bias_into_gemm",
+        ]
+        model_onnx = onnxoptimizer.optimize(model_onnx, passes)
+        onnx.save(model_onnx, onnx_path)
+        print(f"✅ Optimized ONNX graph ({len(model_onnx.graph.node)} nodes)")
+
+    onnx.shape_inference.infer_shapes_path(onnx_path, onnx_path)
+
+
+def test_onnx_model(onnx_path=ONNX_PATH, model_path=MODEL_PATH):
+    """Run a real ONNX forward and compare numerics against the original.
+
+    This is the correctness gate for every export-side optimization
+    (opset bump, constant folding, hand-built graph, FP16): a broken
+    export must not ship just because the session loads.
+    """
+    import onnxruntime as ort
+    from sentence_transformers import SentenceTransformer
+
+    session = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+    inputs = [i.name for i in session.get_inputs()]
+    outputs = [o.name for o in session.get_outputs()]
+    if inputs != ["input_ids"] or outputs != ["embeddings"]:
+        print(f"❌ Unexpected graph signature: {inputs} -> {outputs}")
+        return False
+
+    original_model = SentenceTransformer(model_path)
+    test_text = "func (s *EmbeddingService) GetEmbedding(ctx context.Context)"
+    token_ids = original_model[0].tokenizer.encode(test_text).ids
+    input_ids = np.asarray([token_ids], dtype=np.int64)
+
+    onnx_out = session.run(["embeddings"], {"input_ids": input_ids})[0]
+    ref = original_model.encode([test_text], convert_to_numpy=True)
+
+    max_diff = float(np.max(np.abs(onnx_out - ref)))
+    if max_diff >= 1e-4:
+        print(f"❌ ONNX output diverges from original (max diff {max_diff:.2e})")
+        return False
+
+    print(f"✅ ONNX forward matches original (max diff {max_diff:.2e})")
+    return True
+
+
+def main():
+    convert_model_to_onnx()
+    if not test_onnx_model():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
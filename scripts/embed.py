@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Embedding worker for CodeForge.
+
+Serves embedding requests over stdin/stdout as newline-delimited JSON.
+Inference runs directly on the static embedding matrix dumped by
+extract_embeddings.py: tokenize -> gather rows -> mean -> L2 normalize.
+That is all a model2vec StaticEmbedding does, so there is no need to
+import torch or sentence-transformers here — startup drops from seconds
+to the time it takes to mmap the weights and load the tokenizer.
+
+The caller (e.g. the Go embedding service) spawns one worker subprocess
+and pipes requests:
+
+    request:  {"id": <any>, "text": "..."}
+              {"id": <any>, "texts": ["...", ...]}
+    response: {"id": <any>, "embedding": [...], "dim": N}
+              {"id": <any>, "embeddings": [[...], ...], "dim": N}
+    error:    {"id": <any>, "error": "..."}
+
+On startup the worker emits {"ready": true, "dim": N}, so callers know
+when it is safe to send requests. All diagnostics go to stderr; stdout
+carries only protocol lines.
+
+With --binary, requests stay JSON lines on stdin but responses are raw
+frames on stdout: an <I count><I dim> little-endian header followed by
+count*dim float32 values. JSON-encoding a 384-dim vector costs ~6 KB of
+text plus a parse on the Go side — more than the encode itself for short
+inputs — whereas the binary frame is reinterpreted in place. dim=0 is
+reserved for error frames (detail goes to stderr); any frame with the
+real dim is a success, including count=0 for an empty batch. The ready
+frame sent before the first request is count=0 with the real dim.
+
+The old per-invocation CLI is kept behind --oneshot:
+
+    python3 embed.py --oneshot "some text"
+"""
+
+import json
+import os
+import struct
+import sys
+from collections import OrderedDict
+
+# Let the Rust tokenizer use all cores for encode_batch (it releases the
+# GIL); must be set before tokenizers is imported.
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "true")
+
+import numpy as np
+
+import embed_kernels
+
+DATA_DIR = os.environ.get(
+    "CODEFORGE_EMBED_DATA",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "embedding_data"),
+)
+
+# Upper bound on texts gathered per encode pass; keeps the temporary
+# token-embedding buffers bounded for very large requests.
+BATCH_SIZE = int(os.environ.get("CODEFORGE_EMBED_BATCH_SIZE", "1024"))
+
+# Tokens kept per text; beyond this the mean-pool barely moves anyway.
+MAX_TOKENS = int(os.environ.get("CODEFORGE_EMBED_MAX_TOKENS", "512"))
+
+# Entries kept in the text -> embedding LRU; memory is roughly
+# CACHE_SIZE * dim * 4 bytes (~150 MB at 100k entries and 384 dims).
+CACHE_SIZE = int(os.environ.get("CODEFORGE_EMBED_CACHE_SIZE", "100000"))
+
+
+class StaticModel:
+    """Mean-pooling inference over the extracted static embedding matrix."""
+
+    def __init__(self, data_dir=DATA_DIR):
+        from tokenizers import Tokenizer
+
+        metadata_path = os.path.join(data_dir, "embeddings_metadata.json")
+        if not os.path.exists(metadata_path):
+            raise FileNotFoundError(
+                f"No embedding data in {data_dir} — run extract_embeddings.py first"
+            )
+        with open(metadata_path) as f:
+            metadata = json.load(f)
+
+        vocab_size = metadata["vocab_size"]
+        self.dim = metadata["embedding_dim"]
+        # Rows in the .bin may be padded out to a cache-line multiple;
+        # slice the view back down to the real dimensions.
+        row_stride = metadata.get("row_stride", self.dim)
+        self.weights = np.memmap(
+            os.path.join(data_dir, "embeddings.bin"), dtype=np.float32, mode="r"
+        ).reshape(vocab_size, row_stride)[:, : self.dim]
+        self.tokenizer = Tokenizer.from_file(os.path.join(data_dir, "tokenizer.json"))
+        # Mean-pooling needs no padding, and capping length bounds the
+        # per-text gather cost.
+        self.tokenizer.enable_truncation(max_length=MAX_TOKENS)
+        self.tokenizer.no_padding()
+        self._cache = OrderedDict()  # text -> embedding, LRU-evicted
+        self._scratch = None  # reusable gather buffer, grown on demand
+
+    def encode(self, texts):
+        """Embed a list of texts into an (N, dim) float32 array.
+
+        Repeated texts (code tokens, function names, docstring snippets)
+        are served from an LRU cache; only the misses are encoded.
+        """
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        miss_indices = []
+        miss_texts = []
+        for i, text in enumerate(texts):
+            cached = self._cache.get(text)
+            if cached is not None:
+                self._cache.move_to_end(text)
+                out[i] = cached
+            else:
+                miss_indices.append(i)
+                miss_texts.append(text)
+
+        if miss_texts:
+            encoded = self._encode_uncached(miss_texts)
+            for i, text, row in zip(miss_indices, miss_texts, encoded):
+                out[i] = row
+                self._cache[text] = row.copy()
+            while len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return out
+
+    def _encode_uncached(self, texts):
+        """Tokenize and encode texts without consulting the cache."""
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for start in range(0, len(texts), BATCH_SIZE):
+            batch = texts[start : start + BATCH_SIZE]
+            encodings = self.tokenizer.encode_batch(batch)
+            self._encode_batch(encodings, out[start : start + len(batch)])
+        return out
+
+    def _encode_batch(self, encodings, out):
+        """Gather + segment-mean + normalize one tokenized batch into out.
+
+        One flat gather over the concatenated ids and one reduceat replace
+        the per-text gather+mean loop: same FLOPs, far fewer Python-level
+        ops and temporaries. When Numba is available the fused JIT kernel
+        in embed_kernels skips the gathered intermediate entirely.
+        """
+        lengths = np.array([len(e.ids) for e in encodings], dtype=np.int64)
+
+        if embed_kernels.encode_batch is not None:
+            all_ids = np.concatenate(
+                [np.asarray(e.ids, dtype=np.int64) for e in encodings]
+                or [np.empty(0, dtype=np.int64)]
+            )
+            offsets = np.concatenate(([0], np.cumsum(lengths)))
+            embed_kernels.encode_batch(self.weights, all_ids, offsets, out)
+            return
+
+        nonempty = lengths > 0
+        if not nonempty.any():
+            return
+        all_ids = np.concatenate(
+            [np.asarray(e.ids, dtype=np.int64) for e in encodings if e.ids]
+        )
+        counts = lengths[nonempty]
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+        gathered = self._gather(all_ids)
+        sums = np.add.reduceat(gathered, offsets, axis=0)
+        means = sums / counts[:, None]
+        norms = np.linalg.norm(means, axis=1, keepdims=True)
+        np.divide(means, norms, out=means, where=norms > 0)
+        out[nonempty] = means
+
+    def _gather(self, all_ids):
+        """Gather weight rows into a reused scratch buffer.
+
+        A long-lived worker would otherwise malloc and free a fresh
+        (n_tokens x dim) array on every batch; the scratch grows to the
+        largest batch seen and is reused from then on.
+        """
+        n = len(all_ids)
+        if self._scratch is None or self._scratch.shape[0] < n:
+            self._scratch = np.empty((max(n, 4096), self.dim), dtype=np.float32)
+        gathered = self._scratch[:n]
+        np.take(self.weights, all_ids, axis=0, out=gathered)
+        return gathered
+
+
+def load_model():
+    """Load the extracted weights and tokenizer (cheap — no torch)."""
+    print(f"Loading embedding data from: {DATA_DIR}", file=sys.stderr)
+    model = StaticModel()
+    print(f"Embedding data loaded ({model.dim} dimensions)", file=sys.stderr)
+    return model
+
+
+def generate_embedding(model, text):
+    """Generate a single embedding as a numpy array."""
+    return model.encode([text])[0]
+
+
+def generate_embeddings_batch(model, texts):
+    """Embed a batch of texts, preserving input order.
+
+    The static path has no padding, so there is nothing to gain from
+    length-sorting the batch — encode handles order directly.
+    """
+    return model.encode(texts)
+
+
+def handle_request(model, request):
+    """Process one decoded request dict into a response dict."""
+    text = request.get("text")
+    texts = request.get("texts")
+    if text is None and texts is None:
+        return {"id": request.get("id"), "error": "missing 'text' or 'texts' field"}
+    try:
+        if texts is not None:
+            embeddings = generate_embeddings_batch(model, texts)
+            return {
+                "id": request.get("id"),
+                "embeddings": embeddings.tolist(),
+                "dim": int(embeddings.shape[-1]),
+            }
+        embedding = generate_embedding(model, text)
+    except Exception as e:  # keep the worker alive on bad input
+        return {"id": request.get("id"), "error": str(e)}
+    return {
+        "id": request.get("id"),
+        "embedding": embedding.tolist(),
+        "dim": int(embedding.shape[-1]),
+    }
+
+
+def write_binary_frame(embeddings, dim):
+    """Write one <I count><I dim> + float32-payload frame to stdout.
+
+    dim=0 is the error marker; successful frames always carry the real
+    dim, so an empty batch result (count=0, dim=N) stays distinguishable.
+    """
+    count = embeddings.shape[0]
+    sys.stdout.buffer.write(struct.pack("<II", count, dim))
+    if count:
+        sys.stdout.buffer.write(
+            np.ascontiguousarray(embeddings, dtype=np.float32).tobytes()
+        )
+    sys.stdout.buffer.flush()
+
+
+def handle_request_binary(model, request):
+    """Answer one request with a binary frame instead of JSON."""
+    text = request.get("text")
+    texts = request.get("texts")
+    try:
+        if texts is not None:
+            embeddings = generate_embeddings_batch(model, texts)
+        elif text is not None:
+            embeddings = generate_embedding(model, text).reshape(1, -1)
+        else:
+            raise ValueError("missing 'text' or 'texts' field")
+    except Exception as e:  # error frame: count=0, dim=0, detail on stderr
+        print(f"embed error: {e}", file=sys.stderr)
+        write_binary_frame(np.empty((0, 0), dtype=np.float32), 0)
+        return
+    write_binary_frame(embeddings, model.dim)
+
+
+def serve(model, binary=False):
+    """Read newline-delimited JSON requests from stdin until EOF."""
+    if binary:
+        write_binary_frame(np.empty((0, model.dim), dtype=np.float32), model.dim)
+    else:
+        sys.stdout.write(json.dumps({"ready": True, "dim": model.dim}) + "\n")
+        sys.stdout.flush()
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            if binary:
+                print(f"invalid request: {e}", file=sys.stderr)
+                write_binary_frame(np.empty((0, 0), dtype=np.float32), 0)
+            else:
+                sys.stdout.write(
+                    json.dumps({"error": f"invalid request: {e}"}) + "\n"
+                )
+                sys.stdout.flush()
+            continue
+        if binary:
+            handle_request_binary(model, request)
+            continue
+        response = handle_request(model, request)
+        sys.stdout.write(json.dumps(response) + "\n")
+        sys.stdout.flush()
+
+
+def main():
+    args = sys.argv[1:]
+
+    if args and args[0] == "--oneshot":
+        if len(args) < 2:
+            print("Usage: embed.py --oneshot <text>", file=sys.stderr)
+            sys.exit(1)
+        model = load_model()
+        print(json.dumps(generate_embedding(model, args[1]).tolist()))
+        return
+
+    binary = "--binary" in args
+    args = [a for a in args if a != "--binary"]
+    if args:
+        print(f"Unknown arguments: {args}", file=sys.stderr)
+        print("Usage: embed.py [--binary] [--oneshot <text>]", file=sys.stderr)
+        sys.exit(1)
+
+    serve(load_model(), binary=binary)
+
+
+if __name__ == "__main__":
+    main()
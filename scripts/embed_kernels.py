@@ -0,0 +1,55 @@
+"""
+Optional Numba kernels for embed.py.
+
+The NumPy batch path materializes the gathered (n_tokens x dim) array
+before reducing it. The JIT kernel below fuses gather, mean, and L2
+normalize into a single pass per text with no intermediate allocation,
+parallelized across texts with prange.
+
+Numba is optional: embed.py falls back to the NumPy path when it is not
+installed. encode_batch is None in that case.
+"""
+
+import math
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+if numba is not None:
+
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def encode_batch(weights, ids_flat, offsets, out):
+        """Fused gather + mean + L2 normalize over a tokenized batch.
+
+        offsets has n_texts + 1 entries; text i owns
+        ids_flat[offsets[i]:offsets[i + 1]]. Empty segments produce a
+        zero row. Results are written directly into out.
+        """
+        dim = weights.shape[1]
+        for i in numba.prange(offsets.shape[0] - 1):
+            start = offsets[i]
+            end = offsets[i + 1]
+            if end == start:
+                for d in range(dim):
+                    out[i, d] = 0.0
+                continue
+            acc = np.zeros(dim, dtype=np.float32)
+            for j in range(start, end):
+                row = ids_flat[j]
+                for d in range(dim):
+                    acc[d] += weights[row, d]
+            inv_n = np.float32(1.0 / (end - start))
+            sq = np.float32(0.0)
+            for d in range(dim):
+                acc[d] *= inv_n
+                sq += acc[d] * acc[d]
+            inv_norm = np.float32(1.0 / math.sqrt(sq)) if sq > 0 else np.float32(0.0)
+            for d in range(dim):
+                out[i, d] = acc[d] * inv_norm
+
+else:
+    encode_batch = None
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Extract static embedding weights from the CodeForge embedding model.
+
+model2vec models (e.g. potion-base-8M) are a single StaticEmbedding
+layer: encode is just tokenize -> gather rows -> mean -> L2 normalize.
+Dumping the weight matrix and tokenizer lets inference run without
+PyTorch or sentence-transformers (see embed.py for the Python consumer;
+embeddings.bin is laid out for the Go loader).
+
+Outputs in <output_dir>:
+    embedding_weights.npy     weight matrix (vocab x dim)
+    tokenizer.json            HuggingFace tokenizers file
+    vocab.tsv                 id\ttoken lines, sorted by id (Go loader)
+    embeddings.bin            flat float32 weights for the Go loader
+    embeddings_metadata.json  shapes/dtype info for all of the above
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+
+MODEL_PATH = os.environ.get("CODEFORGE_EMBED_MODEL", "minishlab/potion-base-8M")
+OUTPUT_DIR = os.environ.get(
+    "CODEFORGE_EMBED_DATA",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "embedding_data"),
+)
+
+
+def save_aligned_npy(path, array, align=64):
+    """Write an NPY file whose data section is 64-byte aligned.
+
+    numpy pads the header so the data starts on a 64-byte boundary
+    (ARRAY_ALIGN); writing it explicitly lets us verify that and hand the
+    offset to consumers, so both np.load(mmap_mode='r') and the Go loader
+    get aligned SIMD loads on every row gather. Returns the data offset.
+    """
+    array = np.ascontiguousarray(array)
+    header = np.lib.format.header_data_from_array_1_0(array)
+    with open(path, "wb") as f:
+        np.lib.format.write_array_header_2_0(f, header)
+        offset = f.tell()
+        if offset % align:
+            raise RuntimeError(
+                f"NPY data offset {offset} is not {align}-byte aligned"
+            )
+        array.tofile(f)
+    return offset
+
+
+def extract_model_weights(model_path=MODEL_PATH, output_path=OUTPUT_DIR):
+    """Pull the embedding matrix and tokenizer out of the model."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    # CPU-only thread defaults can be pathological; half the cores is
+    # plenty for a one-shot load + copy-out.
+    torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))
+
+    os.makedirs(output_path, exist_ok=True)
+
+    print(f"Loading model: {model_path}")
+    model = SentenceTransformer(model_path)
+    static = model[0]  # StaticEmbedding module
+
+    embedding_weights = static.embedding.weight.detach().cpu().numpy()
+    vocab_size, embedding_dim = embedding_weights.shape
+    print(f"Extracted weights: {vocab_size} x {embedding_dim}")
+
+    weights_path = os.path.join(output_path, "embedding_weights.npy")
+    data_offset = save_aligned_npy(weights_path, embedding_weights)
+
+    tokenizer = static.tokenizer
+    tokenizer.save(os.path.join(output_path, "tokenizer.json"))
+
+    metadata = {
+        "model_name": model_path,
+        "vocab_size": vocab_size,
+        "embedding_dim": embedding_dim,
+        "normalized": True,
+        # Byte offset of the matrix inside embedding_weights.npy, so Go
+        # can seek past the NPY header and mmap the aligned data directly.
+        "data_offset": data_offset,
+    }
+    with open(os.path.join(output_path, "embeddings_metadata.json"), "w") as f:
+        json.dump(metadata, f, indent=2)
+
+    print(f"✅ Model weights extracted to {output_path}")
+    return embedding_weights
+
+
+def create_go_embedding_data(output_path=OUTPUT_DIR):
+    """Write the weight matrix as flat float32 for the Go loader."""
+    # The full vocab already lives inside tokenizer.json; only the Go
+    # loader wants a flat id\ttoken TSV, so it is generated here rather
+    # than during extraction.
+    from tokenizers import Tokenizer
+
+    tokenizer = Tokenizer.from_file(os.path.join(output_path, "tokenizer.json"))
+    with open(os.path.join(output_path, "vocab.tsv"), "w") as f:
+        for token, token_id in sorted(
+            tokenizer.get_vocab().items(), key=lambda kv: kv[1]
+        ):
+            f.write(f"{token_id}\t{token}\n")
+    # mmap the source matrix: only pages actually touched are read in,
+    # and the conversion below streams instead of doubling resident memory.
+    weights = np.load(os.path.join(output_path, "embedding_weights.npy"), mmap_mode="r")
+    weights_f32 = weights.astype(np.float32, copy=False)
+    vocab_size, dim = weights_f32.shape
+
+    # Pad rows to a multiple of 16 floats (one 64 B cache line) so every
+    # row gather reads whole lines; the reducer sums the zeros for free.
+    row_stride = dim + (-dim) % 16
+    if row_stride != dim:
+        padded = np.zeros((vocab_size, row_stride), dtype=np.float32)
+        padded[:, :dim] = weights_f32
+        weights_f32 = padded
+
+    binary_path = os.path.join(output_path, "embeddings.bin")
+    # tofile streams straight to the descriptor — no tobytes() copy of the
+    # whole matrix in between.
+    weights_f32.tofile(binary_path)
+
+    # int8 with a per-row scale: 4x smaller, so the gather (the bound)
+    # moves a quarter of the bytes. Mean-pooling over tokens cancels most
+    # of the quantization noise.
+    scales = np.max(np.abs(weights_f32), axis=1) / 127.0
+    scales[scales == 0] = 1.0  # all-zero rows quantize to zero anyway
+    quantized = (
+        np.round(weights_f32 / scales[:, None]).clip(-127, 127).astype(np.int8)
+    )
+    int8_path = os.path.join(output_path, "embeddings_int8.bin")
+    quantized.tofile(int8_path)
+    scales_path = os.path.join(output_path, "scales.bin")
+    scales.astype(np.float32, copy=False).tofile(scales_path)
+
+    metadata_path = os.path.join(output_path, "embeddings_metadata.json")
+    with open(metadata_path) as f:
+        metadata = json.load(f)
+    metadata["data_type"] = "float32"
+    metadata["binary_file"] = "embeddings.bin"
+    # Floats per row in the .bin files (>= embedding_dim; rest is zero pad).
+    metadata["row_stride"] = row_stride
+    metadata["int8"] = {
+        "binary_file": "embeddings_int8.bin",
+        "scales_file": "scales.bin",
+        "data_type": "int8",
+        "scale_per_row": True,
+    }
+    with open(metadata_path, "w") as f:
+        json.dump(metadata, f, indent=2)
+
+    print(f"✅ Go embedding data written to {binary_path}")
+    print(f"✅ int8 embedding data written to {int8_path}")
+
+
+def test_extraction(output_path=OUTPUT_DIR):
+    """Sanity-check the extracted artifacts against the metadata."""
+    with open(os.path.join(output_path, "embeddings_metadata.json")) as f:
+        metadata = json.load(f)
+
+    weights = np.load(os.path.join(output_path, "embedding_weights.npy"), mmap_mode="r")
+    if weights.shape != (metadata["vocab_size"], metadata["embedding_dim"]):
+        print(f"❌ Weight shape {weights.shape} does not match metadata")
+        return False
+
+    # Spot-check a handful of rows for garbage values.
+    for token_id in (0, 1, weights.shape[0] // 2, weights.shape[0] - 1):
+        row = weights[token_id]
+        if not np.all(np.isfinite(row)):
+            print(f"❌ Non-finite values in row {token_id}")
+            return False
+
+    row_stride = metadata.get("row_stride", metadata["embedding_dim"])
+    binary_path = os.path.join(output_path, "embeddings.bin")
+    expected_bytes = metadata["vocab_size"] * row_stride * 4
+    if os.path.getsize(binary_path) != expected_bytes:
+        print(f"❌ {binary_path} is not vocab_size * row_stride * 4 bytes")
+        return False
+
+    # Dequantized int8 rows should stay close to the originals.
+    if "int8" in metadata:
+        quantized = np.fromfile(
+            os.path.join(output_path, metadata["int8"]["binary_file"]), dtype=np.int8
+        ).reshape(metadata["vocab_size"], row_stride)[:, : metadata["embedding_dim"]]
+        scales = np.fromfile(
+            os.path.join(output_path, metadata["int8"]["scales_file"]),
+            dtype=np.float32,
+        )
+        error = np.max(np.abs(quantized * scales[:, None] - weights))
+        if error > np.max(np.abs(weights)) / 127.0:
+            print(f"❌ int8 dequantization error too large: {error}")
+            return False
+
+    print("✅ Extraction verified")
+    return True
+
+
+def main():
+    extract_model_weights()
+    create_go_embedding_data()
+    if not test_extraction():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()